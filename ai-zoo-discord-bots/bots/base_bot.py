@@ -5,14 +5,19 @@ This serves as a foundation for all bot implementations.
 import os
 import logging
 import asyncio
+import mmap
 import random
+import functools
+from collections import deque
+from dataclasses import dataclass
 import discord
 from discord.ext import commands
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 
 from utils.config_loader import get_env, load_env_vars
 from utils.conversation import ConversationManager
 from utils.random_delay import delay_response, simulate_typing
+from utils.response_cache import SemanticResponseCache
 from services.llm_service import LLMService
 from services.notion_service import NotionService
 
@@ -23,10 +28,91 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Default intents shared by all bots (message content is required to read messages)
+_DEFAULT_INTENTS = discord.Intents.default()
+_DEFAULT_INTENTS.message_content = True
+_DEFAULT_INTENTS.messages = True
+
+# 基本ロールスクリプトのキャッシュ（パス -> (更新時刻, 内容)）
+_BASE_ROLE_CACHE: Dict[str, Tuple[float, str]] = {}
+
+# 他のボットとして扱う送信者名（小文字化済み）
+_BOT_NAMES_LC = ('gpt-4o-animal', 'claude-animal', 'gpt-4o', 'claude')
+
+# 乱数プールを補充する際にまとめて生成する個数
+RANDOM_POOL_SIZE = 256
+
+# 他のボットからのメッセージに応答する場合の追加指示
+BOT_RESPONSE_GUIDANCE = """
+            
+現在、あなたは他のAIボットからの質問に応答しています。以下のガイドラインに従ってください：
+1. 「ご指摘の通りですね」「おっしゃる通りです」などの同意から始めないでください
+2. 質問に直接答え、相手の発言内容を先に知っていたかのような表現は避けてください
+3. 自分の考えや意見を述べる際は、「私は〜と考えます」「私の見解では〜」などの表現を使ってください
+4. 会話の自然な流れを維持しつつ、不自然な「先読み」を避けてください
+"""
+
+
+@functools.lru_cache(maxsize=1024)
+def _is_bot_sender(sender_name: str) -> bool:
+    """
+    送信者が他のボットかどうかを判定する（送信者名ごとに判定結果をキャッシュ）
+    
+    Args:
+        sender_name: メッセージの送信者名
+        
+    Returns:
+        他のボットの場合はTrue
+    """
+    sender_lc = sender_name.lower()
+    return any(bot_name in sender_lc for bot_name in _BOT_NAMES_LC)
+
+
+@dataclass(frozen=True)
+class _Config:
+    """Bot configuration read from environment variables."""
+    channel_id: int
+    min_response_delay: int
+    max_response_delay: int
+    max_conversation_turns: int
+    semantic_cache_enabled: bool
+
+
+@functools.cache
+def _load_bot_config() -> _Config:
+    """
+    Load bot configuration from environment variables.
+    The result is cached, so environment variables are parsed only once per process.
+    
+    Returns:
+        Bot configuration
+    """
+    return _Config(
+        channel_id=int(os.environ.get('CHANNEL_ID', '0')),
+        min_response_delay=int(os.environ.get('MIN_RESPONSE_DELAY', '5')),
+        max_response_delay=int(os.environ.get('MAX_RESPONSE_DELAY', '15')),
+        max_conversation_turns=int(os.environ.get('MAX_CONVERSATION_TURNS', '10')),
+        semantic_cache_enabled=os.environ.get('SEMANTIC_CACHE_ENABLED', 'false').lower() == 'true',
+    )
+
 
 class BaseDiscordBot(commands.Bot):
     """Base Discord bot for AI Zoo."""
     
+    # 自己紹介メッセージのテンプレートと、キャラクター設定から埋め込む項目
+    _INTRO_TEMPLATE = (
+        "こんにちは！私は{name}です。\n"
+        "{personality}{speaking_style}{interests}{background}{model}{extra}"
+        "気軽に話しかけてください！"
+    )
+    _INTRO_FIELD_LABELS = (
+        ("personality", "性格"),
+        ("speaking_style", "話し方"),
+        ("interests", "興味・関心"),
+        ("background", "背景"),
+        ("model", "使用モデル"),
+    )
+    
     def __init__(self, 
                 character_name: str,
                 command_prefix: str = "!",
@@ -41,19 +127,18 @@ class BaseDiscordBot(commands.Bot):
         """
         # Set up intents
         if intents is None:
-            intents = discord.Intents.default()
-            intents.message_content = True
-            intents.messages = True
+            intents = _DEFAULT_INTENTS
             
         super().__init__(command_prefix=command_prefix, intents=intents)
         
         # Bot configuration
         self.notion_character_name = character_name  # 追加: Notion上でのキャラクター名
         self.character_name = character_name  # Discord上での表示名として使用
-        self.channel_id = int(os.environ.get('CHANNEL_ID', '0'))
-        self.min_response_delay = int(os.environ.get('MIN_RESPONSE_DELAY', '5'))
-        self.max_response_delay = int(os.environ.get('MAX_RESPONSE_DELAY', '15'))
-        self.max_conversation_turns = int(os.environ.get('MAX_CONVERSATION_TURNS', '10'))
+        config = _load_bot_config()
+        self.channel_id = config.channel_id
+        self.min_response_delay = config.min_response_delay
+        self.max_response_delay = config.max_response_delay
+        self.max_conversation_turns = config.max_conversation_turns
         
         # 基本ロールスクリプトのパス
         self.base_role_path = os.path.join(
@@ -69,96 +154,188 @@ class BaseDiscordBot(commands.Bot):
         self.llm_service = LLMService()
         self.notion_service = NotionService()
         
+        # 意味的に類似したメッセージへの応答キャッシュ（任意機能）
+        self._response_cache: Optional[SemanticResponseCache] = None
+        if config.semantic_cache_enabled:
+            try:
+                self._response_cache = SemanticResponseCache()
+            except ImportError as e:
+                logger.warning(f"Semantic response cache disabled: {e}")
+        
         # Initialize conversation manager
         self.conversation_manager = ConversationManager()
         
         # Character settings
         self.character: Optional[Dict[str, Any]] = None
         self.system_prompt: Optional[str] = None
+        self._system_prompt_bot: Optional[str] = None
+        self._intro_message_cache: Optional[str] = None
+        
+        # 参加するチャンネル（on_readyで解決してキャッシュする）
+        self._channel: Optional[discord.abc.Messageable] = None
         
         # Cooldown tracking
         self.in_cooldown = False
         self.cooldown_until = 0
+        self._shutdown = False
+        
+        # ボットごとの乱数生成器と、メッセージ処理ごとに使う乱数のプール
+        self._rng = random.Random()
+        self._msg_len_pool: deque = deque()
+        self._cooldown_pool: deque = deque()
         
         # Register event handlers
         self.setup_events()
     
+    def _draw_from_pool(self, pool: deque, low: int, high: int) -> int:
+        """
+        プールから乱数を1つ取り出す。空の場合はまとめて補充する。
+        
+        Args:
+            pool: 乱数のプール
+            low: 乱数の最小値
+            high: 乱数の最大値
+            
+        Returns:
+            low以上high以下の乱数
+        """
+        if not pool:
+            pool.extend(self._rng.randint(low, high) for _ in range(RANDOM_POOL_SIZE))
+        return pool.popleft()
+    
     def _load_base_role(self) -> str:
         """基本ロールスクリプトを読み込む"""
         try:
-            with open(self.base_role_path, 'r', encoding='utf-8') as f:
-                return f.read().strip()
+            # 同じファイルは更新されていない限り再読み込みしない
+            stat = os.stat(self.base_role_path)
+            mtime = stat.st_mtime
+            cached = _BASE_ROLE_CACHE.get(self.base_role_path)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+            
+            # 読み取り専用でmmapしたページキャッシュから直接デコードし、中間のbytesコピーを作らない
+            # （デコード後の文字列は各プロセスが保持する。空ファイルはmmapできないため空文字列として扱う）
+            base_role = ""
+            if stat.st_size:
+                with open(self.base_role_path, 'rb') as f:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        with memoryview(mm) as view:
+                            base_role = str(view, 'utf-8').strip()
+            _BASE_ROLE_CACHE[self.base_role_path] = (mtime, base_role)
+            return base_role
         except Exception as e:
             logger.error(f"基本ロールスクリプトの読み込みに失敗: {e}")
             return "あなたはDiscordチャットに参加するAIボットです。会話の流れに自然に応答し、常にキャラクターを維持してください。"
     
+    @property
+    def command_prefix(self):
+        """Command prefix for bot commands."""
+        return self._command_prefix
+    
+    @command_prefix.setter
+    def command_prefix(self, value):
+        self._command_prefix = value
+        # 文字列のプレフィックスは設定時に一度だけ判定しておき、on_messageではstartswithで比較する
+        self._str_prefix: Optional[str] = value if isinstance(value, str) else None
+    
+    async def setup_hook(self):
+        """Configure the event loop before the bot connects to Discord."""
+        # Python 3.12以降では、最初のawaitまでタスクを即時実行するeager task factoryを使用
+        if hasattr(asyncio, 'eager_task_factory'):
+            self.loop.set_task_factory(asyncio.eager_task_factory)
+        await super().setup_hook()
+    
+    async def close(self):
+        """Stop background waits and close the connection to Discord."""
+        self._shutdown = True
+        await super().close()
+    
+    def _get_channel(self) -> Optional[discord.abc.Messageable]:
+        """
+        キャッシュ済みのチャンネルを返す。未解決の場合のみ再取得する。
+        
+        Returns:
+            チャンネル、見つからない場合はNone
+        """
+        if self._channel is None and self.channel_id:
+            self._channel = self.get_channel(self.channel_id)
+        return self._channel
+    
     def setup_events(self):
         """Set up Discord event handlers."""
         @self.event
         async def on_ready():
-            logger.info(f"Bot logged in as {self.user}")
+            logger.info("Bot logged in as %s", self.user)
             
             # Load character settings from Notion
             await self.load_character_settings()
             
             # Join the specified channel
             if self.channel_id:
-                channel = self.get_channel(self.channel_id)
+                self._channel = self.get_channel(self.channel_id)
+                channel = self._channel
                 if channel:
-                    logger.info(f"Joined channel: {channel.name}")
+                    logger.info("Joined channel: %s", channel.name)
                     
                     # Generate and send introduction message
                     intro_message = self.generate_introduction_message()
                     await channel.send(intro_message)
-                    logger.info(f"Sent introduction message to channel: {channel.name}")
+                    logger.info("Sent introduction message to channel: %s", channel.name)
                 else:
                     logger.error(f"Could not find channel with ID: {self.channel_id}")
         
+        @self.event
+        async def on_resumed():
+            # 再接続後はチャンネルを解決し直す
+            self._channel = None
+            self._get_channel()
+        
         @self.event
         async def on_message(message):
-            # Ignore messages from self
-            if message.author == self.user:
-                return
-                
-            # Only respond in the specified channel
-            if self.channel_id and message.channel.id != self.channel_id:
+            # Ignore messages from self, messages outside the specified channel,
+            # and everything while we're in cooldown
+            if (message.author == self.user
+                    or (self.channel_id and message.channel.id != self.channel_id)
+                    or self.in_cooldown):
                 return
                 
-            # Process commands first
-            await self.process_commands(message)
-            
-            # Don't respond to commands
-            if message.content.startswith(self.command_prefix):
-                return
-                
-            # Check if we're in cooldown
-            if self.in_cooldown:
+            # Only walk the command tree for messages that look like commands,
+            # and don't respond to them
+            content = message.content
+            if self._str_prefix is not None:
+                is_command = content.startswith(self._str_prefix)
+            else:
+                # 呼び出し可能・複数のプレフィックスはdiscord.pyに判定させる
+                is_command = (await self.get_context(message)).prefix is not None
+            if is_command:
+                await self.process_commands(message)
                 return
                 
             # Add message to conversation history
             self.conversation_manager.add_message(
                 author=message.author.display_name,
-                content=message.content
+                content=content
             )
             
             # Check if we should respond based on conversation turns
             if self.conversation_manager.should_cool_down(self.max_conversation_turns):
-                logger.info(f"Cooling down after {self.max_conversation_turns} conversation turns")
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("Cooling down after %d conversation turns", self.max_conversation_turns)
                 self.in_cooldown = True
                 self.conversation_manager.reset_conversation_turns()
                 
                 # Set cooldown for a random time between 1-3 minutes
-                cooldown_minutes = random.randint(1, 3)
-                self.cooldown_until = asyncio.get_event_loop().time() + (cooldown_minutes * 60)
+                cooldown_minutes = self._draw_from_pool(self._cooldown_pool, 1, 3)
+                self.cooldown_until = self.loop.time() + (cooldown_minutes * 60)
                 
                 # Schedule cooldown reset
-                asyncio.create_task(self.reset_cooldown_after(cooldown_minutes))
+                self.loop.create_task(self.reset_cooldown_after(cooldown_minutes))
                 return
             
             # 子クラスで実装するメソッドを呼び出す（フックメソッド）
             if self.should_respond_to_message(message):
                 # Generate and send response
-                asyncio.create_task(self.respond_to_message(message))
+                self.loop.create_task(self.respond_to_message(message))
     
     # フックメソッド - 子クラスでオーバーライド可能
     def should_respond_to_message(self, message) -> bool:
@@ -176,7 +353,9 @@ class BaseDiscordBot(commands.Bot):
     
     async def load_character_settings(self):
         """Load character settings from Notion."""
-        logger.info(f"Looking up character settings for Notion character name: {self.notion_character_name}")
+        self.invalidate_introduction_cache()
+        
+        logger.info("Looking up character settings for Notion character name: %s", self.notion_character_name)
         
         try:
             # Get character settings from Notion using the Notion character name
@@ -198,13 +377,14 @@ class BaseDiscordBot(commands.Bot):
                 base_role=self.base_role
             )
             
-            actual_name = self.character.get("name", self.notion_character_name)
-            logger.info(f"Character settings loaded successfully:")
-            logger.info(f"- Discord display name: {self.character_name}")
-            logger.info(f"- Notion character name: {self.notion_character_name}")
-            logger.info(f"- Actual name from Notion: {actual_name}")
-            logger.info(f"- Model: {self.character.get('model', 'unknown')}")
-            logger.info(f"- Base role loaded: {bool(self.base_role)}")
+            if logger.isEnabledFor(logging.INFO):
+                actual_name = self.character.get("name", self.notion_character_name)
+                logger.info("Character settings loaded successfully:")
+                logger.info("- Discord display name: %s", self.character_name)
+                logger.info("- Notion character name: %s", self.notion_character_name)
+                logger.info("- Actual name from Notion: %s", actual_name)
+                logger.info("- Model: %s", self.character.get('model', 'unknown'))
+                logger.info("- Base role loaded: %s", bool(self.base_role))
             
         except Exception as e:
             logger.error(f"Failed to load character settings: {e}")
@@ -221,6 +401,9 @@ class BaseDiscordBot(commands.Bot):
                 self.system_prompt = f"You are {self.notion_character_name}.\n\n{self.base_role}"
             else:
                 self.system_prompt = f"You are {self.notion_character_name}. Be friendly and helpful."
+        
+        # 他のボット向けのシステムプロンプトは読み込み時に一度だけ組み立てる
+        self._system_prompt_bot = self.system_prompt + BOT_RESPONSE_GUIDANCE
     
     async def respond_to_message(self, message):
         """
@@ -231,7 +414,7 @@ class BaseDiscordBot(commands.Bot):
         """
         try:
             # Add random delay to simulate thinking/typing
-            await delay_response(self.min_response_delay, self.max_response_delay)
+            await delay_response(self.min_response_delay, self.max_response_delay, rng=self._rng)
             
             # Get model from character settings or default to gpt-4
             model = self.character.get("model", "gpt-4") if self.character else "gpt-4"
@@ -239,21 +422,34 @@ class BaseDiscordBot(commands.Bot):
             # 最後のメッセージの送信者に基づいて、システムプロンプトを動的に調整
             adjusted_system_prompt = self._adjust_system_prompt_for_sender(message.author.display_name)
             
-            # Format conversation history for LLM
-            if model.startswith("gpt"):
-                messages = self.conversation_manager.format_for_openai(adjusted_system_prompt)
-            else:
-                messages = self.conversation_manager.format_for_anthropic(adjusted_system_prompt)
+            # 同じモデル・システムプロンプトで生成した、類似メッセージへの応答があれば再利用する
+            cache_key = (model, adjusted_system_prompt)
+            cache_embedding = None
+            cached_response = None
+            if self._response_cache is not None:
+                cache_embedding, cached_response = await self._response_cache.lookup(message.content, cache_key)
+            
+            if cached_response is None:
+                # Format conversation history for LLM
+                if model.startswith("gpt"):
+                    messages = self.conversation_manager.format_for_openai(adjusted_system_prompt)
+                else:
+                    messages = self.conversation_manager.format_for_anthropic(adjusted_system_prompt)
             
             # Simulate typing
-            message_length = random.randint(50, 200)  # Estimate response length
-            await simulate_typing(message.channel, message_length)
+            message_length = self._draw_from_pool(self._msg_len_pool, 50, 200)  # Estimate response length
+            await simulate_typing(message.channel, message_length, rng=self._rng)
             
-            # Generate response from LLM
-            response = await self.llm_service.generate_response(
-                messages=messages,
-                model=model
-            )
+            if cached_response is not None:
+                response = cached_response
+            else:
+                # Generate response from LLM
+                response = await self.llm_service.generate_response(
+                    messages=messages,
+                    model=model
+                )
+                if self._response_cache is not None:
+                    self._response_cache.store(cache_embedding, response, cache_key)
             
             # Add bot's response to conversation history
             self.conversation_manager.add_message(
@@ -278,24 +474,8 @@ class BaseDiscordBot(commands.Bot):
         Returns:
             調整されたシステムプロンプト
         """
-        # 基本のシステムプロンプト
-        adjusted_prompt = self.system_prompt
-        
-        # 送信者が他のボットかどうかを確認
-        bot_names = ['gpt-4o-animal', 'claude-animal', 'gpt-4o', 'claude']
-        if any(bot_name.lower() in sender_name.lower() for bot_name in bot_names):
-            # 他のボットからのメッセージに応答する場合の追加指示
-            bot_response_guidance = """
-            
-現在、あなたは他のAIボットからの質問に応答しています。以下のガイドラインに従ってください：
-1. 「ご指摘の通りですね」「おっしゃる通りです」などの同意から始めないでください
-2. 質問に直接答え、相手の発言内容を先に知っていたかのような表現は避けてください
-3. 自分の考えや意見を述べる際は、「私は〜と考えます」「私の見解では〜」などの表現を使ってください
-4. 会話の自然な流れを維持しつつ、不自然な「先読み」を避けてください
-"""
-            adjusted_prompt += bot_response_guidance
-            
-        return adjusted_prompt
+        # 他のボットからのメッセージに応答する場合は追加指示付きのプロンプトを使用
+        return self._system_prompt_bot if _is_bot_sender(sender_name) else self.system_prompt
     
     async def reset_cooldown_after(self, minutes: int):
         """
@@ -304,8 +484,19 @@ class BaseDiscordBot(commands.Bot):
         Args:
             minutes: Number of minutes to cooldown
         """
-        logger.info(f"Cooling down for {minutes} minutes")
-        await asyncio.sleep(minutes * 60)
+        logger.info("Cooling down for %d minutes", minutes)
+        
+        # 短い間隔から始めて徐々に間隔を伸ばしながら待機する
+        # シャットダウン時に早く抜けられ、cooldown_untilの延長にも追従できる
+        deadline = self.loop.time() + minutes * 60
+        self.cooldown_until = max(self.cooldown_until, deadline)
+        delay = 0.5
+        while not self._shutdown:
+            remaining = self.cooldown_until - self.loop.time()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 1.5, 30.0)
         self.in_cooldown = False
         logger.info("Cooldown ended")
     
@@ -316,45 +507,36 @@ class BaseDiscordBot(commands.Bot):
         Returns:
             Formatted introduction message
         """
-        intro_parts = []
+        # キャラクター設定は読み込み後に変更されないため、一度組み立てた結果を再利用する
+        if self._intro_message_cache is not None:
+            return self._intro_message_cache
         
-        # Add greeting
-        intro_parts.append(f"こんにちは！私は{self.character_name}です。")
+        character = self.character or {}
         
-        # Add personality
-        if self.character and "personality" in self.character:
-            intro_parts.append(f"性格: {self.character['personality']}")
-        
-        # Add speaking style
-        if self.character and "speaking_style" in self.character:
-            intro_parts.append(f"話し方: {self.character['speaking_style']}")
-        
-        # Add interests
-        if self.character and "interests" in self.character:
-            interests = self.character["interests"]
-            if isinstance(interests, list):
-                interests_str = "、".join(interests)
-            else:
-                interests_str = interests
-            intro_parts.append(f"興味・関心: {interests_str}")
-        
-        # Add background if available
-        if self.character and "background" in self.character:
-            intro_parts.append(f"背景: {self.character['background']}")
-        
-        # Add model info
-        if self.character and "model" in self.character:
-            intro_parts.append(f"使用モデル: {self.character['model']}")
+        # 各項目は設定がある場合のみ1行（改行込み）として埋め込む
+        fields = {"name": self.character_name}
+        for key, label in self._INTRO_FIELD_LABELS:
+            if key not in character:
+                fields[key] = ""
+                continue
+            value = character[key]
+            if key == "interests" and isinstance(value, list):
+                value = "、".join(value)
+            fields[key] = f"{label}: {value}\n"
         
         # 子クラスで追加情報を設定できるようにするためのフックメソッド
         additional_info = self.get_additional_introduction_info()
-        if additional_info:
-            intro_parts.append(additional_info)
+        fields["extra"] = f"{additional_info}\n" if additional_info else ""
         
-        # Add invitation to chat
-        intro_parts.append("気軽に話しかけてください！")
-        
-        return "\n".join(intro_parts)
+        self._intro_message_cache = self._INTRO_TEMPLATE.format_map(fields)
+        return self._intro_message_cache
+    
+    def invalidate_introduction_cache(self) -> None:
+        """
+        Discard the cached introduction message.
+        Call this when state used by get_additional_introduction_info changes.
+        """
+        self._intro_message_cache = None
     
     # フックメソッド - 子クラスでオーバーライド可能
     def get_additional_introduction_info(self) -> Optional[str]:
@@ -378,10 +560,10 @@ class BaseDiscordBot(commands.Bot):
             logger.error("No channel ID specified for scheduled message")
             return
             
-        channel = self.get_channel(self.channel_id)
+        channel = self._get_channel()
         if not channel:
             logger.error(f"Could not find channel with ID: {self.channel_id}")
             return
             
         await channel.send(message)
-        logger.info(f"Sent scheduled message: {message}")
+        logger.info("Sent scheduled message: %s", message)
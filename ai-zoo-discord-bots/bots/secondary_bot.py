@@ -5,7 +5,6 @@ This can be used as a template for additional bots.
 import os
 import logging
 import asyncio
-import random
 import discord
 from typing import Optional
 
@@ -52,7 +51,7 @@ class SecondaryBot(BaseDiscordBot):
             True if the bot should respond, False otherwise
         """
         # Randomly decide whether to respond based on probability
-        if random.random() > self.response_probability:
+        if self._rng.random() > self.response_probability:
             logger.debug("Randomly decided not to respond")
             return False
         return True
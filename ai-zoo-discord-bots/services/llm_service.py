@@ -3,7 +3,7 @@ Service for interacting with Language Model APIs (OpenAI, Anthropic, etc.)
 """
 import os
 import logging
-import json
+import orjson
 from typing import Dict, Any, List, Optional, Union
 import aiohttp
 import asyncio
@@ -94,14 +94,14 @@ class LLMService:
             async with session.post(
                 "https://api.openai.com/v1/chat/completions",
                 headers=headers,
-                json=payload
+                data=orjson.dumps(payload)
             ) as response:
                 if response.status != 200:
                     error_text = await response.text()
                     logger.error(f"OpenAI API error: {error_text}")
                     raise Exception(f"OpenAI API error: {response.status} - {error_text}")
                 
-                result = await response.json()
+                result = await response.json(loads=orjson.loads)
                 return result["choices"][0]["message"]["content"]
                 
     async def _generate_anthropic_response(self, 
@@ -157,14 +157,14 @@ class LLMService:
             async with session.post(
                 api_endpoint,
                 headers=headers,
-                json=payload
+                data=orjson.dumps(payload)
             ) as response:
                 if response.status != 200:
                     error_text = await response.text()
                     logger.error(f"Anthropic API error: {error_text}")
                     raise Exception(f"Anthropic API error: {response.status} - {error_text}")
                 
-                result = await response.json()
+                result = await response.json(loads=orjson.loads)
                 # Handle different response formats between APIs
                 if model.startswith("claude-3"):
                     return result["content"][0]["text"]
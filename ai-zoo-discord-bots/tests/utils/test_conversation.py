@@ -0,0 +1,82 @@
+"""
+Tests for the conversation manager.
+"""
+import pytest
+
+from utils.conversation import ConversationManager
+
+
+@pytest.fixture
+def manager():
+    """Conversation manager with a small history limit."""
+    return ConversationManager(max_history=3)
+
+
+def add_messages(manager, messages):
+    """Add (author, content) pairs as seen by the bot named 'me'."""
+    for author, content in messages:
+        manager.add_message(author=author, content=content, bot_name="me")
+
+
+def test_format_for_openai(manager):
+    """Messages are formatted with roles and author prefixes."""
+    add_messages(manager, [("alice", "hi"), ("Claude", "hello"), ("me", "hey")])
+
+    assert manager.format_for_openai("SYS") == [
+        {"role": "system", "content": "SYS"},
+        {"role": "user", "content": "alice: hi"},
+        {"role": "user", "content": "Bot (Claude): hello"},
+        {"role": "assistant", "content": "me: hey"},
+    ]
+
+
+def test_format_for_anthropic(manager):
+    """Messages are formatted as a single prompt string."""
+    add_messages(manager, [("alice", "hi"), ("Claude", "hello"), ("me", "hey")])
+
+    assert manager.format_for_anthropic("SYS") == (
+        "SYS\n\n"
+        "Human (alice): hi\n\n"
+        "Bot (Claude): hello\n\n"
+        "Assistant: hey\n\n"
+        "Assistant: "
+    )
+
+
+def test_format_after_trimming(manager):
+    """Only messages still in the history are formatted after trimming."""
+    add_messages(manager, [("alice", "1"), ("bob", "2"), ("me", "3"), ("alice", "4"), ("bob", "5")])
+
+    assert [msg["content"] for msg in manager.history] == ["3", "4", "5"]
+    assert manager.format_for_openai("SYS") == [
+        {"role": "system", "content": "SYS"},
+        {"role": "assistant", "content": "me: 3"},
+        {"role": "user", "content": "alice: 4"},
+        {"role": "user", "content": "bob: 5"},
+    ]
+    assert manager.format_for_anthropic("SYS") == (
+        "SYS\n\nAssistant: 3\n\nHuman (alice): 4\n\nHuman (bob): 5\n\nAssistant: "
+    )
+
+
+def test_format_after_clearing(manager):
+    """Clearing the history also clears the formatted messages."""
+    add_messages(manager, [("alice", "1"), ("bob", "2")])
+    manager.clear_history()
+
+    assert manager.format_for_openai("SYS") == [{"role": "system", "content": "SYS"}]
+    assert manager.format_for_anthropic("SYS") == "SYS\n\nAssistant: "
+
+    add_messages(manager, [("alice", "3")])
+    assert manager.format_for_openai("SYS")[1:] == [{"role": "user", "content": "alice: 3"}]
+    assert manager.format_for_anthropic("SYS") == "SYS\n\nHuman (alice): 3\n\nAssistant: "
+
+
+def test_format_for_openai_returns_copies(manager):
+    """Mutating the returned messages does not affect later prompts."""
+    add_messages(manager, [("alice", "hi")])
+
+    messages = manager.format_for_openai("SYS")
+    messages[1]["content"] = "changed"
+
+    assert manager.format_for_openai("SYS")[1] == {"role": "user", "content": "alice: hi"}
@@ -0,0 +1,84 @@
+"""
+Tests for the semantic response cache.
+"""
+import math
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from utils.response_cache import SemanticResponseCache
+
+
+# テキストごとに固定の単位ベクトルを返すエンコーダー
+VECTORS = {
+    "hello": [1.0, 0.0, 0.0],
+    "hello!": [math.cos(0.1), math.sin(0.1), 0.0],   # cos ≈ 0.995
+    "hi there": [math.cos(0.6), math.sin(0.6), 0.0],  # cos ≈ 0.825
+    "weather": [0.0, 0.0, 1.0],
+}
+
+
+def fake_encoder(text):
+    """Return a fixed unit vector for a known text."""
+    return np.array(VECTORS[text], dtype=np.float32)
+
+
+@pytest.fixture
+def cache():
+    """Semantic response cache backed by the fake encoder."""
+    return SemanticResponseCache(encoder=fake_encoder, max_entries=2, threshold=0.90)
+
+
+@pytest.mark.asyncio
+async def test_lookup_empty_cache_misses(cache):
+    """An empty cache never returns a response."""
+    embedding, response = await cache.lookup("hello")
+    assert response is None
+    assert embedding.shape == (3,)
+
+
+@pytest.mark.asyncio
+async def test_lookup_hit_above_threshold(cache):
+    """A message similar above the threshold reuses the stored response."""
+    embedding, _ = await cache.lookup("hello")
+    cache.store(embedding, "response to hello")
+
+    _, response = await cache.lookup("hello!")
+    assert response == "response to hello"
+
+
+@pytest.mark.asyncio
+async def test_lookup_miss_below_threshold(cache):
+    """A message below the threshold is a miss."""
+    embedding, _ = await cache.lookup("hello")
+    cache.store(embedding, "response to hello")
+
+    _, response = await cache.lookup("hi there")
+    assert response is None
+
+
+@pytest.mark.asyncio
+async def test_lookup_is_scoped_by_key(cache):
+    """Responses stored under one key are not returned for another key."""
+    embedding, _ = await cache.lookup("hello", "human prompt")
+    cache.store(embedding, "response to hello", "human prompt")
+
+    _, response = await cache.lookup("hello", "bot prompt")
+    assert response is None
+    _, response = await cache.lookup("hello", "human prompt")
+    assert response == "response to hello"
+
+
+@pytest.mark.asyncio
+async def test_store_evicts_oldest_entry(cache):
+    """Storing beyond max_entries evicts the oldest response first."""
+    for text in ("hello", "hi there", "weather"):
+        embedding, _ = await cache.lookup(text)
+        cache.store(embedding, f"response to {text}")
+
+    _, response = await cache.lookup("hello")
+    assert response is None
+    _, response = await cache.lookup("hi there")
+    assert response == "response to hi there"
+    _, response = await cache.lookup("weather")
+    assert response == "response to weather"
@@ -20,6 +20,9 @@ class ConversationManager:
         self.max_history = max_history
         self.max_tokens = max_tokens
         self.conversation_turns = 0
+        # 履歴と同じ順序で保持する、各API向けに整形済みのメッセージ
+        self._openai_messages: List[Dict[str, str]] = []
+        self._anthropic_messages: List[str] = []
         
     def add_message(self, author: str, content: str, bot_name: Optional[str] = None) -> None:
         """
@@ -43,10 +46,14 @@ class ConversationManager:
         }
         
         self.history.append(message)
+        self._openai_messages.append(self._format_openai_message(message))
+        self._anthropic_messages.append(self._format_anthropic_message(message))
         
         # If we've exceeded max history, remove oldest messages
         if len(self.history) > self.max_history:
             self.history = self.history[-self.max_history:]
+            self._openai_messages = self._openai_messages[-self.max_history:]
+            self._anthropic_messages = self._anthropic_messages[-self.max_history:]
             
         # If this is not the bot's own message, increment conversation turns
         if not is_self:
@@ -74,21 +81,32 @@ class ConversationManager:
         Returns:
             List of messages formatted for OpenAI API
         """
+        # 履歴の各メッセージはadd_messageの時点で整形済み
+        # 呼び出し側での変更が内部状態に影響しないよう、各メッセージはコピーして返す
         messages = [{"role": "system", "content": system_prompt}]
+        messages.extend(dict(msg) for msg in self._openai_messages)
+        return messages
+    
+    def _format_openai_message(self, msg: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Format a single history entry for OpenAI API.
         
-        for msg in self.history:
-            role = "assistant" if msg.get("is_self", False) else "user"
+        Args:
+            msg: Message from the conversation history
             
-            # 他のボットからのメッセージを区別するためのプレフィックスを追加
-            if not msg.get("is_self", False) and msg['author'].lower() in ['gpt-4o-animal', 'claude-animal', 'gpt-4o', 'claude']:
-                # ボットの名前リストを拡張する必要がある場合は、ここに追加
-                content = f"Bot ({msg['author']}): {msg['content']}"
-            else:
-                content = f"{msg['author']}: {msg['content']}"
-                
-            messages.append({"role": role, "content": content})
+        Returns:
+            Message formatted for OpenAI API
+        """
+        role = "assistant" if msg.get("is_self", False) else "user"
+        
+        # 他のボットからのメッセージを区別するためのプレフィックスを追加
+        if not msg.get("is_self", False) and msg['author'].lower() in ['gpt-4o-animal', 'claude-animal', 'gpt-4o', 'claude']:
+            # ボットの名前リストを拡張する必要がある場合は、ここに追加
+            content = f"Bot ({msg['author']}): {msg['content']}"
+        else:
+            content = f"{msg['author']}: {msg['content']}"
             
-        return messages
+        return {"role": role, "content": content}
     
     def format_for_anthropic(self, system_prompt: str) -> str:
         """
@@ -100,22 +118,29 @@ class ConversationManager:
         Returns:
             Formatted conversation for Anthropic API
         """
-        conversation = f"{system_prompt}\n\n"
-        
-        for msg in self.history:
-            # 自分のメッセージはAssistant、他のボットのメッセージはBot (名前)、それ以外はHuman (名前)として表示
-            if msg.get("is_self", False):
-                prefix = "Assistant"
-            elif msg['author'].lower() in ['gpt-4o-animal', 'claude-animal', 'gpt-4o', 'claude']:
-                # ボットの名前リストを拡張する必要がある場合は、ここに追加
-                prefix = f"Bot ({msg['author']})"
-            else:
-                prefix = f"Human ({msg['author']})"
-            
-            conversation += f"{prefix}: {msg['content']}\n\n"
+        # 履歴の各メッセージはadd_messageの時点で整形済み
+        return f"{system_prompt}\n\n{''.join(self._anthropic_messages)}Assistant: "
+    
+    def _format_anthropic_message(self, msg: Dict[str, Any]) -> str:
+        """
+        Format a single history entry for Anthropic Claude API.
+        
+        Args:
+            msg: Message from the conversation history
             
-        conversation += "Assistant: "
-        return conversation
+        Returns:
+            Message formatted for Anthropic API
+        """
+        # 自分のメッセージはAssistant、他のボットのメッセージはBot (名前)、それ以外はHuman (名前)として表示
+        if msg.get("is_self", False):
+            prefix = "Assistant"
+        elif msg['author'].lower() in ['gpt-4o-animal', 'claude-animal', 'gpt-4o', 'claude']:
+            # ボットの名前リストを拡張する必要がある場合は、ここに追加
+            prefix = f"Bot ({msg['author']})"
+        else:
+            prefix = f"Human ({msg['author']})"
+        
+        return f"{prefix}: {msg['content']}\n\n"
     
     def reset_conversation_turns(self) -> None:
         """Reset the conversation turn counter."""
@@ -136,6 +161,8 @@ class ConversationManager:
     def clear_history(self) -> None:
         """Clear the conversation history."""
         self.history = []
+        self._openai_messages = []
+        self._anthropic_messages = []
         self.conversation_turns = 0
         
     def estimate_token_count(self, text: str) -> int:
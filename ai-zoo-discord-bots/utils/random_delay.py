@@ -6,42 +6,49 @@ import random
 from typing import Optional, Tuple
 
 
-async def delay_response(min_seconds: int = 5, max_seconds: int = 15) -> None:
+async def delay_response(min_seconds: int = 5, max_seconds: int = 15,
+                         rng: Optional[random.Random] = None) -> None:
     """
     Delay the bot's response by a random amount of time within the specified range.
     
     Args:
         min_seconds: Minimum delay in seconds
         max_seconds: Maximum delay in seconds
+        rng: Random number generator to use (defaults to the global random module)
     """
-    delay = random.randint(min_seconds, max_seconds)
+    delay = (rng or random).randint(min_seconds, max_seconds)
     await asyncio.sleep(delay)
 
 
 def get_typing_duration(message_length: int, 
-                         typing_speed_range: Tuple[int, int] = (50, 100)) -> float:
+                         typing_speed_range: Tuple[int, int] = (50, 100),
+                         rng: Optional[random.Random] = None) -> float:
     """
     Calculate a realistic typing duration based on message length and typing speed.
     
     Args:
         message_length: Length of the message in characters
         typing_speed_range: Range of typing speed in characters per minute (min, max)
+        rng: Random number generator to use (defaults to the global random module)
     
     Returns:
         Typing duration in seconds
     """
+    rng = rng or random
+    
     # Calculate typing speed in characters per second
-    typing_speed = random.randint(typing_speed_range[0], typing_speed_range[1]) / 60
+    typing_speed = rng.randint(typing_speed_range[0], typing_speed_range[1]) / 60
     
     # Calculate typing duration with some randomness
     base_duration = message_length / typing_speed
-    randomness = random.uniform(0.8, 1.2)  # Add 20% randomness
+    randomness = rng.uniform(0.8, 1.2)  # Add 20% randomness
     
     return base_duration * randomness
 
 
 async def simulate_typing(channel, message_length: int, 
-                          typing_speed_range: Tuple[int, int] = (50, 100)) -> None:
+                          typing_speed_range: Tuple[int, int] = (50, 100),
+                          rng: Optional[random.Random] = None) -> None:
     """
     Simulate typing in a Discord channel for a realistic duration.
     
@@ -49,8 +56,9 @@ async def simulate_typing(channel, message_length: int,
         channel: Discord channel to simulate typing in
         message_length: Length of the message in characters
         typing_speed_range: Range of typing speed in characters per minute (min, max)
+        rng: Random number generator to use (defaults to the global random module)
     """
-    duration = get_typing_duration(message_length, typing_speed_range)
+    duration = get_typing_duration(message_length, typing_speed_range, rng=rng)
     
     # Discord's typing indicator lasts 10 seconds, so we need to send it multiple times
     # for longer messages
@@ -0,0 +1,140 @@
+"""
+Utility for caching LLM responses by semantic similarity of the incoming message.
+"""
+import asyncio
+import functools
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # 任意の依存関係
+    np = None
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # 任意の依存関係
+    SentenceTransformer = None
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+@functools.lru_cache(maxsize=None)
+def get_embedding_model(model_name: str = DEFAULT_EMBEDDING_MODEL):
+    """
+    Load a sentence-transformers model once per process.
+    All bots in the process share the same warm model.
+
+    Args:
+        model_name: Name of the sentence-transformers model
+
+    Returns:
+        Loaded SentenceTransformer model
+
+    Raises:
+        ImportError: If sentence-transformers is not installed
+    """
+    if SentenceTransformer is None:
+        raise ImportError("sentence-transformers is required for the default embedding model")
+    return SentenceTransformer(model_name)
+
+
+class _Partition:
+    """Fixed-size ring buffer of normalized embeddings and their responses."""
+
+    def __init__(self, max_entries: int, dim: int):
+        self.matrix = np.zeros((max_entries, dim), dtype=np.float32)
+        self.responses: List[Optional[str]] = [None] * max_entries
+        self.count = 0
+        self.next_index = 0
+
+
+class SemanticResponseCache:
+    """Bounded cache of (embedding, response) pairs looked up by cosine similarity."""
+
+    def __init__(self,
+                 model_name: str = DEFAULT_EMBEDDING_MODEL,
+                 max_entries: int = 256,
+                 threshold: float = 0.90,
+                 encoder: Optional[Callable[[str], Any]] = None):
+        """
+        Initialize the semantic response cache.
+
+        Args:
+            model_name: Name of the sentence-transformers model used for embeddings
+            max_entries: Maximum number of cached responses per key (oldest are evicted first)
+            threshold: Minimum cosine similarity for a cached response to be reused
+            encoder: Function returning a unit-length embedding for a text
+                     (defaults to the shared sentence-transformers model)
+
+        Raises:
+            ImportError: If numpy or sentence-transformers is not installed
+        """
+        if np is None:
+            raise ImportError("numpy is required for the semantic response cache")
+
+        if encoder is None:
+            # プロセス起動時にモデルを読み込んでおく（全ボットで共有）
+            model = get_embedding_model(model_name)
+            encoder = functools.partial(model.encode, normalize_embeddings=True)
+
+        self.encoder = encoder
+        self.max_entries = max_entries
+        self.threshold = threshold
+        # キー（システムプロンプトなど）ごとに応答を分けて保持する
+        self.partitions: Dict[Hashable, _Partition] = {}
+
+    def _find(self, key: Hashable, embedding) -> Optional[str]:
+        """
+        Find the cached response most similar to an embedding.
+
+        Args:
+            key: Cache key the response must have been stored under
+            embedding: Normalized embedding to look up
+
+        Returns:
+            Cached response if the best similarity exceeds the threshold, None otherwise
+        """
+        partition = self.partitions.get(key)
+        if partition is None or not partition.count:
+            return None
+
+        # 正規化済みなので内積がコサイン類似度になる
+        similarities = partition.matrix[:partition.count] @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] > self.threshold:
+            return partition.responses[best]
+        return None
+
+    async def lookup(self, text: str, key: Hashable = "") -> Tuple[Any, Optional[str]]:
+        """
+        Look up a cached response for a message.
+
+        Args:
+            text: Incoming message content
+            key: Cache key, e.g. the system prompt the response must have been generated with
+
+        Returns:
+            Tuple of (embedding, cached response or None). Pass the embedding to store() on a miss.
+        """
+        # 埋め込み計算はCPU負荷が高いため、イベントループを塞がないよう別スレッドで実行
+        embedding = np.asarray(await asyncio.to_thread(self.encoder, text), dtype=np.float32)
+        return embedding, self._find(key, embedding)
+
+    def store(self, embedding, response: str, key: Hashable = "") -> None:
+        """
+        Store a response in the cache, evicting the oldest entry for the key when full.
+
+        Args:
+            embedding: Embedding returned by lookup()
+            response: Response generated for the message
+            key: Cache key the response was generated under
+        """
+        partition = self.partitions.get(key)
+        if partition is None:
+            partition = _Partition(self.max_entries, len(embedding))
+            self.partitions[key] = partition
+
+        partition.matrix[partition.next_index] = embedding
+        partition.responses[partition.next_index] = response
+        partition.next_index = (partition.next_index + 1) % self.max_entries
+        partition.count = min(partition.count + 1, self.max_entries)